@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
+import hashlib
 import math
+import os
+import pickle
 import random
+import threading
+import zlib
 import matplotlib.pyplot as plt
 
 def cargar_datos(archivo_costos, archivo_nodos):
@@ -46,18 +51,132 @@ def generar_vecino(ruta):
     nueva_ruta[idx1], nueva_ruta[idx2] = nueva_ruta[idx2], nueva_ruta[idx1]
     return nueva_ruta
 
-def recocido_simulado(matriz_costos, cd, tiendas_asignadas, temp_inicial, tasa_enfriamiento, num_iteraciones):
+class EscritorCheckpoint:
+    """
+    Escribe checkpoints en un hilo aparte para no detener el ciclo principal.
+    El estado se serializa en el hilo principal (copia consistente) y la
+    compresión y escritura a disco se hacen en segundo plano.
+    El historial de convergencia no se reescribe completo: solo se agregan
+    las entradas nuevas al archivo '<checkpoint>.hist'.
+    """
+    def __init__(self, ruta_archivo):
+        self.ruta_archivo = ruta_archivo
+        self._hilo = None
+        self._error = None
+
+    def guardar(self, estado, historial_nuevo):
+        datos = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+        bytes_historial = np.asarray(historial_nuevo, dtype=np.float64).tobytes()
+        self.esperar()
+        self._hilo = threading.Thread(target=self._escribir, args=(datos, bytes_historial))
+        self._hilo.start()
+
+    def _escribir(self, datos, bytes_historial):
+        # El historial se agrega antes de reemplazar el checkpoint, así el
+        # archivo .hist siempre tiene al menos las entradas que indica el checkpoint.
+        # El checkpoint se escribe a un archivo temporal y luego se reemplaza,
+        # para que un proceso interrumpido nunca lo deje a medio escribir.
+        try:
+            with open(self.ruta_archivo + '.hist', 'ab') as f:
+                f.write(bytes_historial)
+                f.flush()
+                os.fsync(f.fileno())
+            temporal = self.ruta_archivo + '.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(zlib.compress(datos))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta_archivo)
+        except OSError as e:
+            self._error = e
+
+    def esperar(self):
+        """
+        Espera a que termine la escritura pendiente, si la hay.
+        """
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+def cargar_checkpoint(ruta_archivo):
+    """
+    Lee un checkpoint guardado con EscritorCheckpoint. Devuelve None si no existe.
+    El historial se lee del archivo .hist y se recorta a la longitud guardada
+    en el checkpoint, descartando entradas escritas después de él.
+    """
+    if ruta_archivo is None or not os.path.exists(ruta_archivo):
+        return None
+    with open(ruta_archivo, 'rb') as f:
+        estado = pickle.loads(zlib.decompress(f.read()))
+
+    longitud = estado['longitud_historial']
+    with open(ruta_archivo + '.hist', 'r+b') as f:
+        estado['historial'] = np.fromfile(f, dtype=np.float64, count=longitud)
+        f.truncate(longitud * np.dtype(np.float64).itemsize)
+    return estado
+
+def eliminar_checkpoint(ruta_archivo):
+    """
+    Elimina el checkpoint y su archivo de historial, si existen.
+    """
+    for archivo in (ruta_archivo, ruta_archivo + '.hist'):
+        if os.path.exists(archivo):
+            os.remove(archivo)
+
+def huella_datos(matriz_costos):
+    """
+    Calcula una huella de la matriz de costos para detectar checkpoints
+    generados con datos distintos.
+    """
+    return hashlib.sha1(np.ascontiguousarray(matriz_costos, dtype=np.float64).tobytes()).hexdigest()
+
+def recocido_simulado(matriz_costos, cd, tiendas_asignadas, temp_inicial, tasa_enfriamiento, num_iteraciones,
+                      archivo_checkpoint=None, intervalo_checkpoint=1000):
     """
     Ejecuta el algoritmo de recocido simulado para optimizar la ruta de un CD.
+    Si se indica archivo_checkpoint, guarda el estado cada intervalo_checkpoint
+    iteraciones y, si el archivo ya existe, reanuda exactamente desde él.
     """
-    solucion_actual = generar_solucion_inicial(cd, tiendas_asignadas)
-    costo_actual = calcular_costo_ruta(solucion_actual, matriz_costos)
-    mejor_solucion = solucion_actual
-    mejor_costo = costo_actual
-    temperatura = temp_inicial
-    historial = [costo_actual]
+    estado = cargar_checkpoint(archivo_checkpoint)
+    if archivo_checkpoint:
+        parametros = (int(cd), [int(t) for t in tiendas_asignadas], temp_inicial, tasa_enfriamiento,
+                      num_iteraciones, huella_datos(matriz_costos))
 
-    for i in range(num_iteraciones):
+    if estado is not None:
+        if estado['parametros'] != parametros:
+            raise ValueError(f"El checkpoint '{archivo_checkpoint}' corresponde a otros parámetros o datos "
+                             f"del CD {cd}. Elimine '{archivo_checkpoint}' para empezar de nuevo.")
+        solucion_actual = estado['solucion_actual'].tolist()
+        costo_actual = estado['costo_actual']
+        mejor_solucion = estado['mejor_solucion'].tolist()
+        mejor_costo = estado['mejor_costo']
+        temperatura = estado['temperatura']
+        historial = estado['historial'].tolist()
+        inicio = estado['iteracion']
+        random.setstate(estado['estado_rng'])
+        print(f"CD {cd} | Reanudando desde la iteración {inicio}/{num_iteraciones} | Mejor costo: {mejor_costo:.2f}")
+    else:
+        solucion_actual = generar_solucion_inicial(cd, tiendas_asignadas)
+        costo_actual = calcular_costo_ruta(solucion_actual, matriz_costos)
+        mejor_solucion = solucion_actual
+        mejor_costo = costo_actual
+        temperatura = temp_inicial
+        historial = [costo_actual]
+        inicio = 0
+
+    escritor = None
+    if archivo_checkpoint:
+        escritor = EscritorCheckpoint(archivo_checkpoint)
+        if estado is None:
+            # Se descarta un historial huérfano de una ejecución anterior
+            eliminar_checkpoint(archivo_checkpoint)
+        # Cantidad de entradas del historial que ya están en el archivo .hist
+        historial_guardado = len(historial) if estado is not None else 0
+
+    for i in range(inicio, num_iteraciones):
         vecino = generar_vecino(solucion_actual)
         costo_vecino = calcular_costo_ruta(vecino, matriz_costos)
         delta = costo_vecino - costo_actual
@@ -76,6 +195,25 @@ def recocido_simulado(matriz_costos, cd, tiendas_asignadas, temp_inicial, tasa_e
         if (i + 1) % 5000 == 0:
             print(f"CD {cd} | Iteración {i+1}/{num_iteraciones} | Mejor costo: {mejor_costo:.2f}")
 
+        # El último checkpoint se guarda siempre: al reanudar, un CD terminado
+        # se omite y el estado del generador aleatorio sigue igual para el siguiente.
+        if escritor and ((i + 1) % intervalo_checkpoint == 0 or i + 1 == num_iteraciones):
+            escritor.guardar({
+                'parametros': parametros,
+                'iteracion': i + 1,
+                'solucion_actual': np.asarray(solucion_actual, dtype=np.int32),
+                'costo_actual': costo_actual,
+                'mejor_solucion': np.asarray(mejor_solucion, dtype=np.int32),
+                'mejor_costo': mejor_costo,
+                'temperatura': temperatura,
+                'longitud_historial': len(historial),
+                'estado_rng': random.getstate(),
+            }, historial[historial_guardado:])
+            historial_guardado = len(historial)
+
+    if escritor:
+        escritor.esperar()
+
     return mejor_solucion, mejor_costo, historial
 
 def graficar_convergencia(historial_global):
@@ -96,6 +234,7 @@ if __name__ == '__main__':
     TEMP_INICIAL = 10000
     TASA_ENFRIAMIENTO = 0.999
     NUM_ITERACIONES = 30000
+    INTERVALO_CHECKPOINT = 1000
 
     archivo_matriz_costos = 'matriz_costos_combustible.xlsx'
     archivo_nodos_info = 'datos_distribucion_tiendas.xlsx'
@@ -113,7 +252,9 @@ if __name__ == '__main__':
 
         mejor_ruta, mejor_costo, historial = recocido_simulado(
             matriz_costos, cd, tiendas_asignadas,
-            TEMP_INICIAL, TASA_ENFRIAMIENTO, NUM_ITERACIONES
+            TEMP_INICIAL, TASA_ENFRIAMIENTO, NUM_ITERACIONES,
+            archivo_checkpoint=f'checkpoint_cd_{cd}.ckpt',
+            intervalo_checkpoint=INTERVALO_CHECKPOINT
         )
 
         resultados.append((nombres[cd], mejor_costo, mejor_ruta))
@@ -136,3 +277,7 @@ if __name__ == '__main__':
 
     print(f"\nCosto total global optimizado: {costo_total:.2f}")
     graficar_convergencia(historial_global)
+
+    # --- La ejecución terminó: los checkpoints ya no son necesarios ---
+    for cd in cds:
+        eliminar_checkpoint(f'checkpoint_cd_{cd}.ckpt')
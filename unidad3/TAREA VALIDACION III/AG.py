@@ -2,7 +2,12 @@
 # -*- coding: utf-8 -*-
 
 # --- IMPORTACIONES ---
+import hashlib
+import os
+import pickle
 import random
+import threading
+import zlib
 import numpy as np
 import pandas as pd
 import operator
@@ -185,19 +190,114 @@ def nuevaGeneracion(generacionActual, indivSelecionados, razonMutacion):
     return nuevaGeneracion
 
 
+# --- CHECKPOINTS: GUARDAR Y REANUDAR ---
+# Propósito: Escribir el estado del algoritmo en un hilo aparte para no
+# detener el ciclo evolutivo. El estado se serializa en el hilo principal
+# (copia consistente) y la compresión y escritura se hacen en segundo plano.
+class EscritorCheckpoint:
+    def __init__(self, rutaArchivo):
+        self.rutaArchivo = rutaArchivo
+        self._hilo = None
+        self._error = None
+
+    def guardar(self, estado):
+        datos = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+        self.esperar()
+        self._hilo = threading.Thread(target=self._escribir, args=(datos,))
+        self._hilo.start()
+
+    # Escribe a un archivo temporal y luego lo reemplaza, para que un proceso
+    # interrumpido nunca deje un checkpoint a medio escribir
+    def _escribir(self, datos):
+        try:
+            temporal = self.rutaArchivo + '.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(zlib.compress(datos))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.rutaArchivo)
+        except OSError as e:
+            self._error = e
+
+    # Espera a que termine la escritura pendiente, si la hay
+    def esperar(self):
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+def cargarCheckpoint(rutaArchivo):
+    # Devuelve el estado guardado, o None si no existe el archivo
+    if rutaArchivo is None or not os.path.exists(rutaArchivo):
+        return None
+    with open(rutaArchivo, 'rb') as f:
+        return pickle.loads(zlib.decompress(f.read()))
+
+def huellaMunicipios(listaMunicipios):
+    # Huella de las coordenadas para detectar checkpoints de otros datos
+    coordenadas = [(municipio.x, municipio.y) for municipio in listaMunicipios]
+    return hashlib.sha1(repr(coordenadas).encode('utf-8')).hexdigest()
+
+def poblacionAIndices(pop, listaMunicipios):
+    # Guarda cada ruta como índices de municipios (más compacto).
+    # Una misma lista puede aparecer varias veces en la población (la ruleta
+    # selecciona con repetición y la mutación es en sitio); se conserva ese
+    # compartimiento para que la ejecución reanudada sea idéntica.
+    indices = {id(m): i for i, m in enumerate(listaMunicipios)}
+    convertidas = {}
+    resultado = []
+    for individuo in pop:
+        if id(individuo) not in convertidas:
+            convertidas[id(individuo)] = [indices[id(m)] for m in individuo]
+        resultado.append(convertidas[id(individuo)])
+    return resultado
+
+def indicesAPoblacion(popIndices, listaMunicipios):
+    convertidas = {}
+    resultado = []
+    for individuo in popIndices:
+        if id(individuo) not in convertidas:
+            convertidas[id(individuo)] = [listaMunicipios[i] for i in individuo]
+        resultado.append(convertidas[id(individuo)])
+    return resultado
+
+
 # --- FUNCIÓN PRINCIPAL: EL ALGORITMO GENÉTICO ---
-def algoritmoGenetico(poblacion, tamanoPoblacion, indivSelecionados, razonMutacion, generaciones):
-    
-    # 1. Crear la población inicial
-    pop = poblacionInicial(tamanoPoblacion, poblacion)
-    
-    distanciaInicial = 1 / clasificacionRutas(pop)[0][1]
-    print(f"Distancia Inicial: {distanciaInicial:.4f}")
+def algoritmoGenetico(poblacion, tamanoPoblacion, indivSelecionados, razonMutacion, generaciones,
+                      archivoCheckpoint=None, intervaloCheckpoint=50):
     
-    mejorDistanciaGlobal = distanciaInicial
+    # Si existe un checkpoint, se reanuda exactamente desde él
+    parametros = (huellaMunicipios(poblacion), tamanoPoblacion, indivSelecionados, razonMutacion, generaciones)
+    estado = cargarCheckpoint(archivoCheckpoint)
+
+    if estado is not None:
+        if estado['parametros'] != parametros:
+            raise ValueError(f"El checkpoint '{archivoCheckpoint}' corresponde a otros parámetros o municipios. "
+                             f"Elimine '{archivoCheckpoint}' para empezar de nuevo.")
+        pop = indicesAPoblacion(estado['poblacion'], poblacion)
+        distanciaInicial = estado['distanciaInicial']
+        mejorDistanciaGlobal = estado['mejorDistanciaGlobal']
+        historial = estado['historial']
+        inicio = estado['generacion']
+        random.setstate(estado['estadoRNG'])
+        print(f"Reanudando desde la generación {inicio} | Mejor global = {mejorDistanciaGlobal:.4f}")
+    else:
+        # 1. Crear la población inicial
+        pop = poblacionInicial(tamanoPoblacion, poblacion)
+        
+        distanciaInicial = 1 / clasificacionRutas(pop)[0][1]
+        print(f"Distancia Inicial: {distanciaInicial:.4f}")
+        
+        mejorDistanciaGlobal = distanciaInicial
+        historial = []
+        inicio = 0
+
+    escritor = EscritorCheckpoint(archivoCheckpoint) if archivoCheckpoint else None
 
     # 2. El ciclo evolutivo
-    for i in range(0, generaciones):
+    for i in range(inicio, generaciones):
         pop = nuevaGeneracion(pop, indivSelecionados, razonMutacion)
         
         # --- MODIFICACIÓN: Mostrar Progreso ---
@@ -207,18 +307,53 @@ def algoritmoGenetico(poblacion, tamanoPoblacion, indivSelecionados, razonMutaci
             
             if distanciaActual < mejorDistanciaGlobal:
                 mejorDistanciaGlobal = distanciaActual
+            # Historial de convergencia: (generación, distancia actual, mejor global)
+            historial.append((i + 1, distanciaActual, mejorDistanciaGlobal))
             
             print(f"Generación {i + 1}: Mejor distancia actual = {distanciaActual:.4f} | Mejor global = {mejorDistanciaGlobal:.4f}")
         # --- FIN DE LA MODIFICACIÓN ---
 
+        # Guardar checkpoint (siempre en la última generación)
+        if escritor and ((i + 1) % intervaloCheckpoint == 0 or i + 1 == generaciones):
+            escritor.guardar({
+                'parametros': parametros,
+                'generacion': i + 1,
+                'poblacion': poblacionAIndices(pop, poblacion),
+                'distanciaInicial': distanciaInicial,
+                'mejorDistanciaGlobal': mejorDistanciaGlobal,
+                'historial': historial,
+                'estadoRNG': random.getstate(),
+            })
+
+    if escritor:
+        escritor.esperar()
+
     # 3. Imprimir resultados finales
     distanciaFinal = 1 / clasificacionRutas(pop)[0][1]
     print(f"\nDistancia Final: {distanciaFinal:.4f}")
     
-    # 4. Devolver la mejor ruta encontrada
+    # 4. Devolver la mejor ruta encontrada y el historial de convergencia
     bestRouteIndex = clasificacionRutas(pop)[0][0]
     mejorRuta = pop[bestRouteIndex]
-    return mejorRuta
+    return mejorRuta, historial
+
+
+# --- FUNCIÓN DE GRÁFICOS: CONVERGENCIA ---
+def graficarConvergencia(historial):
+    generaciones = [g for g, _, _ in historial]
+    distanciasActuales = [d for _, d, _ in historial]
+    mejoresGlobales = [m for _, _, m in historial]
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(generaciones, distanciasActuales, 'o--', color='gray', label='Mejor distancia actual')
+    plt.plot(generaciones, mejoresGlobales, '-', color='dodgerblue', linewidth=2, label='Mejor global')
+    plt.title('Convergencia - Algoritmo Genético')
+    plt.xlabel('Generación')
+    plt.ylabel('Distancia')
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.6)
+    plt.savefig('grafico_convergencia_ag.png')
+    print("\nGráfico de convergencia guardado como 'grafico_convergencia_ag.png'")
 
 
 # --- FUNCIÓN DE GRÁFICOS (NUEVA) ---
@@ -282,17 +417,26 @@ if __name__ == "__main__":
         listaMunicipios.append( municipio(x, y) )
 
     # 3. Ejecutar el algoritmo genético
-    mejor_ruta = algoritmoGenetico(
+    # Si el proceso se interrumpe, al volver a ejecutarlo continúa desde
+    # el último checkpoint guardado en 'checkpoint_ag.ckpt'
+    mejor_ruta, historial = algoritmoGenetico(
         poblacion=listaMunicipios,      # La lista de todos los municipios
         tamanoPoblacion=100,            # 100 individuos (rutas) por generación
         indivSelecionados=20,           # 20 individuos de élite (20%)
         razonMutacion=0.01,             # 1% de probabilidad de que un gen mute
-        generaciones=500                # Número de ciclos evolutivos
+        generaciones=500,               # Número de ciclos evolutivos
+        archivoCheckpoint='checkpoint_ag.ckpt',  # Archivo de checkpoint
+        intervaloCheckpoint=50          # Guardar cada 50 generaciones
     )
 
+    # La ejecución terminó: el checkpoint ya no es necesario
+    if os.path.exists('checkpoint_ag.ckpt'):
+        os.remove('checkpoint_ag.ckpt')
+
     # 4. Imprimir la mejor ruta encontrada
     print("\nMejor ruta encontrada: ")
     print(mejor_ruta)
 
-    # 5. Graficar la mejor ruta
+    # 5. Graficar la convergencia y la mejor ruta
+    graficarConvergencia(historial)
     graficarRuta(listaMunicipios, mejor_ruta)
\ No newline at end of file